@@ -0,0 +1,353 @@
+"""
+This is the search of the checkerboard puzzle solver.
+
+It imports only the standard library (no pythonista modules), so that the
+search can also be run and timed outside of pythonista, e.g. under pypy:
+
+    pypy3 checkerboard_solve.py
+
+solver.py imports it to find the solution, and animates the solution with
+pythonista's "scene" library.
+"""
+
+import array
+import dataclasses
+import logging
+
+mycolors = ('black', 'red')  # indexed by color bit, (x ^ y) & 1 on the board
+# the board square addrs, ordered by row then column, so that board_addrs[b] is
+# the square of bit b (y*8 + x) of a board mask
+board_addrs = tuple((x, y) for y in range(8) for x in range(8))
+full_mask = (1 << 64) - 1  # bit y*8 + x is set for each board square (x, y)
+col_0_mask = 0x0101010101010101  # the board squares (0, y)
+col_7_mask = col_0_mask << 7  # the board squares (7, y)
+# the color bit of each board square, indexed by bit number y*8 + x
+board_color_bits = bytes((b ^ b >> 3) & 1 for b in range(64))
+
+# the 12 pieces, per square addrs relative to the leftmost lowest square, and
+# the color of the leftmost lowest square
+piece_specs = [
+    ([(0, 0), (0, 1), (0, 2), (1, 2)], 'red'),
+    ([(0, 0), (0, 1), (0, 2), (0, 3), (-1, 3)], 'red'),
+    ([(0, 0), (0, 1), (0, 2), (1, 2), (0, 3)], 'red'),
+    ([(0, 0), (0, 1), (0, 2), (1, 2), (1, 3)], 'black'),
+    ([(0, 0), (0, 1), (0, 2), (-1, 2), (-1, 3)], 'red'),
+    ([(0, 0), (0, 1), (0, 2), (0, 3), (-1, 2), (-1, 1)], 'black'),
+    ([(0, 0), (0, 1), (0, 2), (-1, 2), (1, 0)], 'red'),
+    ([(0, 0), (0, 1), (0, 2), (0, 3), (-1, 3)], 'black'),
+    ([(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (2, 0)], 'red'),
+    ([(0, 0), (0, 1), (0, 2), (0, 3), (-1, 1), (-1, 2), (1, 1), (1, 2)],
+     'red'),
+    ([(0, 0), (0, 1), (0, 2), (0, 3), (1, 1)], 'red'),
+    ([(0, 0), (0, 1), (0, 2), (-1, 2), (1, 0)], 'red'),
+]
+
+
+def leftmost_lowest(addrs):
+    """Return the leftmost address from the lowest row of addresses.
+
+    addrs may be any iterable which can be iterated twice, e.g. a set.
+    """
+    ymin = min(y for x, y in addrs)
+    xmin = min(x for x, y in addrs if y == ymin)
+    return (xmin, ymin)
+
+
+def addrs_mask(addrs):
+    """Return a bitmask with bit y*8 + x set for each address (x, y)."""
+    mask = 0
+    for x, y in addrs:
+        mask |= 1 << (y * 8 + x)
+    return mask
+
+
+def lowest_open_bit(board_mask):
+    """Return the bit number of the leftmost lowest open board square.
+
+    Bits y*8 + x are in row then column order, so the leftmost lowest open
+    square is the lowest clear bit.  Adding 1 carries through the low run of
+    set bits into that clear bit, and XOR keeps just the run and the bit, so
+    bit_length() - 1 is the bit number.  (64 if the board is full.)
+    """
+    return (board_mask ^ (board_mask + 1)).bit_length() - 1
+
+
+def grow_mask(mask):
+    """Return mask plus the board squares one step left, right, up or down."""
+    return (mask
+            | (mask << 1) & ~col_0_mask
+            | (mask >> 1) & ~col_7_mask
+            | mask << 8
+            | mask >> 8) & full_mask
+
+
+def has_small_region(board_mask, seed_mask, min_size):
+    """Return True if an open region of < min_size squares touches seed_mask.
+
+    A region is a set of open squares connected edge to edge.  Only the
+    regions which include an open square of seed_mask are flood filled, and
+    each fill stops as soon as the region is known to be big enough.  To check
+    every region, pass full_mask as seed_mask.
+    """
+    open_mask = ~board_mask & full_mask
+    seeds = seed_mask & open_mask
+    while seeds:
+        region = seeds & -seeds
+        while bin(region).count('1') < min_size:
+            grown = (region
+                     | (region << 1) & ~col_0_mask
+                     | (region >> 1) & ~col_7_mask
+                     | region << 8
+                     | region >> 8) & open_mask  # grow_mask, inlined
+            if grown == region:
+                return True
+            region = grown
+        seeds &= ~region
+    return False
+
+
+def rotate_addrs(addrs):
+    """Rotate 90 deg and return new addrs and offset to new leftmost lowest.
+
+    Rotating CW maps (x, y) to (y, -x), so the new lowest row comes from the
+    rightmost column, and its leftmost square from the lowest square of that
+    column.  The new addrs are returned as a tuple.
+    """
+    xmax = max(x for x, y in addrs)
+    ymin = min(y for x, y in addrs if x == xmax)
+    offset_addr = (-ymin, xmax)
+    new_addrs = tuple((y - ymin, xmax - x) for x, y in addrs)
+    return new_addrs, offset_addr
+
+
+def orient(square_addrs, ll_bit):
+    """Return the piece orientations, as lists indexed by orientation id.
+
+    square_addrs are relative to the leftmost lowest square, whose color bit
+    is ll_bit.  Orientation ids correspond to 90 deg CW rotations.  The lists
+    returned are
+    *   square_addrs[oid], a tuple of square addresses per the orientation id
+    *   offset_addr[oid], the move reqd to translate ll[oid] to ll[0]
+    *   ll_square_bit[oid], the color bit of the leftmost lowest square
+    """
+    square_addrs = [tuple(square_addrs)]
+    offset_addr = [(0, 0)]
+    ll_square_bit = [ll_bit]
+
+    # rotate CW 90, 180, 270, and append to lists indexed by orientation id
+    for oid in range(3):
+        new_square_addrs, partial_offset_addr = rotate_addrs(square_addrs[oid])
+        new_offset_addr = (offset_addr[oid][1] + partial_offset_addr[0],
+                           -offset_addr[oid][0] + partial_offset_addr[1])
+        new_ll_square_bit = ll_square_bit[oid] ^ (
+            (partial_offset_addr[0] ^ partial_offset_addr[1]) & 1)
+
+        square_addrs.append(new_square_addrs)
+        offset_addr.append(new_offset_addr)
+        ll_square_bit.append(new_ll_square_bit)
+
+    return square_addrs, offset_addr, ll_square_bit
+
+
+def search_tables(square_addrs, ll_square_bit):
+    """Return the search tables of a piece, as lists indexed by orientation id.
+
+    square_addrs and ll_square_bit are per orient().  The lists returned are
+    *   addr_bits[oid], the bitmask of square_addrs[oid], anchored so that the
+        leftmost lowest square is bit 0
+    *   placement_bits[oid][b], the bitmask of the squares covered when the
+        leftmost lowest square is placed on board square b (bit b), or 0 if
+        the piece would fall off the board.  Per the (xmin, xmax, ymax)
+        bounds of square_addrs[oid], off-board placements are excluded up
+        front (a shifted bitmask would otherwise wrap around into a
+        neighboring row).
+    and unique_oids, the orientation ids with distinct (addr_bits,
+    ll_square_bit), i.e. without the repeats of a symmetric piece.
+    """
+    addr_bits = [addrs_mask(addrs) for addrs in square_addrs]
+    # (xmin, xmax, ymax) of square_addrs[oid], only to build placement_bits
+    addr_bounds = [(min(x for x, y in addrs),
+                    max(x for x, y in addrs),
+                    max(y for x, y in addrs))
+                   for addrs in square_addrs]
+    placement_bits = [
+        tuple(mask << b
+              if x + xmin >= 0 and x + xmax <= 7 and y + ymax <= 7 else 0
+              for b, (x, y) in enumerate(board_addrs))
+        for mask, (xmin, xmax, ymax) in zip(addr_bits, addr_bounds)
+    ]
+
+    # a rotation which maps the piece (and its colors) onto itself gives
+    # nothing new to try
+    keys = list(zip(addr_bits, ll_square_bit))
+    unique_oids = [oid for oid in range(4) if keys.index(keys[oid]) == oid]
+
+    return addr_bits, placement_bits, unique_oids
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class PieceData:
+    """A PieceData object is the description of a puzzle piece, without UI.
+
+    The per orientation attributes are tuples indexed by orientation id (90
+    deg CW rotations), per orient() and search_tables()
+    *   square_addrs[oid], offset_addr[oid], ll_square_bit[oid]
+    *   addr_bits[oid], placement_bits[oid]
+    and unique_oids is a tuple of the orientation ids worth trying.
+    """
+
+    id: int
+    square_addrs: tuple
+    offset_addr: tuple
+    ll_square_bit: tuple
+    addr_bits: tuple
+    placement_bits: tuple
+    unique_oids: tuple
+
+    @classmethod
+    def from_spec(cls, piece_id, square_addrs, ll_color):
+        """Return a new PieceData object per a piece_specs entry."""
+        # square_addrs are relative to the leftmost lowest square
+        assert leftmost_lowest(square_addrs) == (0, 0)
+
+        square_addrs, offset_addr, ll_square_bit = orient(
+            square_addrs, mycolors.index(ll_color))
+        addr_bits, placement_bits, unique_oids = search_tables(
+            square_addrs, ll_square_bit)
+        return cls(piece_id, tuple(square_addrs), tuple(offset_addr),
+                   tuple(ll_square_bit), tuple(addr_bits),
+                   tuple(placement_bits), tuple(unique_oids))
+
+
+# the pieces' data, computed once at import, indexed by piece id
+pieces_data = tuple(PieceData.from_spec(piece_id, square_addrs, ll_color)
+                    for piece_id, (square_addrs, ll_color)
+                    in enumerate(piece_specs))
+
+
+def solve(pieces):
+    """Return a solution as a list of (piece id, orientation id, ll addr).
+
+    pieces is a sequence of PieceData objects, indexed by piece id.  The
+    search is depth-first: the leftmost lowest open board square is covered
+    by each unplaced piece orientation whose leftmost lowest square has the
+    same color, and the search descends on each viable placement until the
+    board is full.  Only the orientation ids in unique_oids are tried, so a
+    symmetric piece isn't tried twice in the same position.  Likewise, of two
+    or more identical pieces (same shapes and colors), a piece is only tried
+    once the lower-numbered ones have been placed.  No scene objects are
+    touched, so the search runs as fast as plain python allows.
+
+    A placement which leaves a region of open squares smaller than the
+    smallest remaining piece is a dead end, and is rejected without
+    descending.
+
+    The search is a loop over an explicit stack rather than a recursion.  The
+    candidates are listed per ll color bit, and a candidate is identified by a
+    cursor into its list, so that the scan of the candidates for a board space
+    can be resumed after a backtrack.
+    """
+    num_pieces = len(pieces)
+
+    # twins_masks[piece_id] has a bit set for each lower-numbered identical
+    # piece, all of which must be placed before this one
+    keys = [frozenset(zip(piece.addr_bits, piece.ll_square_bit))
+            for piece in pieces]
+    twins_masks = [sum(1 << twin_id for twin_id in range(piece_id)
+                       if keys[twin_id] == keys[piece_id])
+                   for piece_id in range(num_pieces)]
+
+    # the candidates per ll color bit, as immutable tuples, in piece id then
+    # orientation id order
+    candidates_by_bit = tuple(
+        tuple((piece_id, oid, piece.placement_bits[oid], twins_masks[piece_id])
+              for piece_id, piece in enumerate(pieces)
+              for oid in piece.unique_oids
+              if piece.ll_square_bit[oid] == ll_bit)
+        for ll_bit in range(2))
+
+    # min_sizes[used_mask] is the size of the smallest unplaced piece
+    sizes = [len(piece.square_addrs[0]) for piece in pieces]
+    min_sizes = [min([size for piece_id, size in enumerate(sizes)
+                      if not used_mask >> piece_id & 1], default=0)
+                 for used_mask in range(1 << num_pieces)]
+
+    # the search stack, a fixed-size array per field, indexed by depth (the
+    # number of placed pieces).  board_masks and used_masks are the state
+    # before the placement at that depth, and cursors the candidate to resume
+    # at after a backtrack.
+    board_masks = array.array('Q', [0] * (num_pieces + 1))
+    used_masks = array.array('Q', [0] * (num_pieces + 1))
+    cursors = array.array('b', [0] * num_pieces)
+    piece_ids = array.array('b', [0] * num_pieces)
+    oids = array.array('b', [0] * num_pieces)
+    anchor_bits = array.array('b', [0] * num_pieces)
+    attempt_counter = 0
+
+    depth = 0
+    cursor = 0
+    b = lowest_open_bit(0)  # the anchor bit, i.e. of the leftmost lowest space
+    while depth < num_pieces:
+        board_mask = board_masks[depth]
+        used_mask = used_masks[depth]
+        candidates = candidates_by_bit[board_color_bits[b]]
+        num_candidates = len(candidates)
+
+        # scan the remaining candidates for the first viable placement
+        while cursor < num_candidates:
+            piece_id, oid, placement_bits, twins_mask = candidates[cursor]
+            cursor += 1
+            if used_mask >> piece_id & 1:
+                continue
+            if used_mask & twins_mask != twins_mask:
+                continue
+            attempt_counter += 1
+
+            shifted_mask = placement_bits[b]
+            if not shifted_mask or shifted_mask & board_mask:
+                continue  # off the board, or overlapping placed pieces
+            # only the regions bordering the new piece can have shrunk, but
+            # if the smallest unplaced piece got bigger, any region can now
+            # be too small, so all are checked
+            min_size = min_sizes[used_mask | 1 << piece_id]
+            if min_size > min_sizes[used_mask]:
+                seed_mask = full_mask
+            else:
+                seed_mask = grow_mask(shifted_mask)
+            if has_small_region(board_mask | shifted_mask, seed_mask,
+                                min_size):
+                continue
+            break
+        else:
+            # the candidates are exhausted, so revert the latest placement
+            if depth == 0:
+                break  # no solution
+            depth -= 1
+            cursor = cursors[depth]
+            b = anchor_bits[depth]  # as cached when the placement was pushed
+            continue
+
+        # the placement is viable, so push it and descend
+        cursors[depth] = cursor
+        piece_ids[depth] = piece_id
+        oids[depth] = oid
+        anchor_bits[depth] = b
+        board_masks[depth + 1] = board_mask | shifted_mask
+        used_masks[depth + 1] = used_mask | 1 << piece_id
+        depth += 1
+        cursor = 0
+        b = lowest_open_bit(board_masks[depth])
+
+    placements = [(piece_ids[d], oids[d],
+                   (anchor_bits[d] & 7, anchor_bits[d] >> 3))
+                  for d in range(depth)]
+    # get the logger per call, not at import:  solver.py reloads logging, which
+    # would orphan a logger got before the reload
+    logger = logging.getLogger(__name__)
+    logger.info('%s: %r', 'attempt_counter', attempt_counter)
+    return placements
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print(tuple(solve(pieces_data)))
@@ -4,8 +4,17 @@ This is a checkerboard puzzle solver.
 A checkerboard which has been cut into 12 pieces is reassembled.
 
 Notes re performance
-    The solution is reached at 298856 attempts (~ 6.7 hours at
-    750 attempts/minute with the duration set to 0.00 seconds)
+    The solution is reached at 298856 attempts.  Animating every attempt
+    took ~ 6.7 hours (at 750 attempts/minute with the duration set to 0.00
+    seconds), so the search is done by checkerboard_solve.solve() without
+    any scene actions, and only the placements of the solution are animated.
+
+    Rejecting placements which leave a region of open squares too small for
+    any remaining piece cuts the search to 126763 attempts.  Skipping the
+    repeated orientations of symmetric pieces cuts it to 76737 attempts, and
+    placing the two identical pieces in order only cuts it to 59062 attempts.
+    Checking every open region, not just those bordering the new piece, when
+    the smallest remaining piece gets bigger cuts it to 59043 attempts.
 
 See also
 *   background info, and discussion of a solver implemented in C++
@@ -31,42 +40,40 @@ Exerpts from the docs of pythonista's "scene" library
 """
 
 import importlib
-import itertools
 import logging
 import math
-import pprint
-import time
 
 import scene  # pythonista
 import sound  # pythonista
 import ui  # pythonista
 
+from checkerboard_solve import (board_addrs, board_color_bits, mycolors,
+                                pieces_data, solve)
+
 # Why reload logging?  It seems like (?), in a pythonista session, the effect
 # of basicConfig persists over runs, and this reload is effective in resetting.
 importlib.reload(logging)  # revert existing config, if any
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=logging.INFO,
     format='%(asctime)s\t%(levelname)s\t%(name)s\t %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S',
 )
 
 logger = logging.getLogger(__name__)
-# logger.debug('%s:\n%s', 'dir(scene)', pprint.pformat(dir(scene)))
 
 ppu = 40  # pixels per unit distance or square edge
 line_width = ppu / 10
 
-# initialization values for action timing params
-#   0.00 seconds ~ 750 attempts/minute
-#   0.01 seconds ~ 630 attempts/minute
-#   0.07 seconds ~ 180 attempts/minute
-mytiming_unit = 0.00  # duration in seconds
+# initialization values for action timing params (per replayed placement)
+mytiming_unit = 0.50  # duration in seconds
 mytiming = [mytiming_unit, scene.TIMING_SINODIAL]  # duration, timing_mode
-wait_duration = mytiming_unit * 10
+wait_duration = mytiming_unit / 2
+audio_enabled = True  # False to replay silently (no dings)
 
-mycolors = ('black', 'red')
 unitsize = scene.Size(1, 1) * ppu  # in pixels
-board_addrs = [(x, y) for x in range(8) for y in range(8)]
+
+# the position in pixels of each board square, per addr, as plain tuples
+board_px = {(x, y): (x * ppu, y * ppu) for x, y in board_addrs}
 
 
 class Spotlight(scene.ShapeNode):
@@ -81,186 +88,99 @@ class Spotlight(scene.ShapeNode):
                                         stroke_color='yellow')
 
 
-def leftmost_lowest(addrs):
-    """Return the leftmost address from the lowest row of addresses."""
-    ymin = min([y for x, y in addrs])
-    xmin = min([x for x, y in addrs if y == ymin])
-    return (xmin, ymin)
-
-
-def rotate_addrs(addrs):
-    """Rotate 90 deg and return new addrs and offset to new leftmost lowest."""
-    new_addrs = [(y, -x) for x, y in addrs]
-    offset_addr = leftmost_lowest(new_addrs)
-    offset_addr = (-offset_addr[0], -offset_addr[1])  # *= -1
-    new_addrs = [(x + offset_addr[0], y + offset_addr[1])
-                 for x, y in new_addrs]
-    return new_addrs, offset_addr
-
+def new_line_path(dx, dy):
+    """Return a path for a line from (0, 0) to (dx, dy) * ppu."""
+    path = ui.Path()
+    path.line_to(dx * ppu, dy * ppu)
+    path.line_width = line_width
+    return path
 
-# new_addrs, offset_addr = rotate_addrs([(0, 0), (0, 1), (0, 2), (1, 2)])
-# logger.debug('%s: %r', '(new_addrs, offset_addr)', (new_addrs, offset_addr))
 
+# piece border segments are unit lines, horizontal for the top and bottom
+# borders and vertical for the right and left borders.  The two paths are
+# shared by all the border segments.
+hpath = new_line_path(1, 0)
+vpath = new_line_path(0, 1)
 
-class Piece(scene.SpriteNode):
-    """A Piece object represents a puzzle piece.
+# border segment prototypes, per direction to the neighbor (top, bottom, right,
+# left):  the shared path, and the position relative to the square
+half_ppu = ppu / 2
+border_protos = {
+    (0, 1): (hpath, scene.Point(0, 1) * half_ppu),
+    (0, -1): (hpath, scene.Point(0, -1) * half_ppu),
+    (1, 0): (vpath, scene.Point(1, 0) * half_ppu),
+    (-1, 0): (vpath, scene.Point(-1, 0) * half_ppu),
+}
 
-    A piece object's child nodes are squares, per orientation id 0 (no
-    rotation)
 
-    *   square_addrs[oid] is a list of square addresses per the orientation id
-    *   offset_addr[oid] is the move reqd to translate ll[oid] to ll[0].  It's
-        used to (a) determine ll_color[oid], and (b) to determine a destination
-        position.
-    *   ll_color[oid] is the color of the leftmost lowest square per the
-        orientation id.  It's used to define a generator that is matched to the
-        leftmost lowest space.
-     """
+class PieceSprite(scene.SpriteNode):
+    """A PieceSprite object represents a puzzle piece on screen.
 
-    piece_id_generator = itertools.count()
-
-    def __init__(self, square_addrs, ll_color):
-        # square_addrs are relative to the leftmost lowest square
-        assert leftmost_lowest(square_addrs) == (0, 0)
+    Its child nodes are squares, per orientation id 0 (no rotation), of the
+    piece described by its PieceData object, self.data.  offset_px[oid] is
+    data.offset_addr[oid] in pixels, used to determine a destination position.
+    """
 
-        self.id = next(self.piece_id_generator)
+    def __init__(self, data):
+        self.data = data
+        self.id = data.id
+        square_addrs = data.square_addrs[0]
+        ll_bit = data.ll_square_bit[0]
 
         # build (a) the piece sprite with blue outline, (b) shadow, a Node obj
         # Why the piece.shadow?  Because it remains parked in the pool sprite,
         # visible after the piece sprite is moved/placed.
         shadow = scene.Node()
         self.shadow = shadow  # retain access
+        addr_set = frozenset(square_addrs)  # for the neighbor tests below
         for x, y in square_addrs:
+            position = unitsize * (x, y)  # scene.Point(i, j)*ppu
+
             # add a black or red square to the piece sprite
-            k = (mycolors.index(ll_color) + x + y) % 2
-            # "Manhattan distance" from ll, or L1 norm, modulo 2
+            k = ll_bit ^ ((x ^ y) & 1)
+            # "Manhattan distance" from ll, or L1 norm, modulo 2, flips the bit
             square = scene.SpriteNode(
                 color=mycolors[k],
-                position=unitsize * (x, y),  # scene.Point(i, j)*ppu,
+                position=position,
                 size=unitsize)
             square.alpha = 0.5
             self.add_child(square)
 
             # add a clear square to the shadow Node object
             clear_square = scene.SpriteNode(color='clear',
-                                            position=unitsize * (x, y),
+                                            position=position,
                                             size=unitsize)
             clear_square.alpha = 0.25
             shadow.add_child(clear_square)
 
-            # outline segments
-            if (x, y + 1) not in square_addrs:
-                # top border
-                path = ui.Path()
-                path.line_to((1) * ppu, (0) * ppu)
-                path.line_width = line_width
-
-                border_segment = scene.ShapeNode(path=path,
-                                                 stroke_color='blue')
-                border_segment.position = scene.Point(0, 1) * ppu / 2
-                square.add_child(border_segment)
-
-            if (x, y - 1) not in square_addrs:
-                # bottom border
-                path = ui.Path()
-                path.line_to((1) * ppu, (0) * ppu)
-                path.line_width = line_width
-
-                border_segment = scene.ShapeNode(path=path,
-                                                 stroke_color='blue')
-                border_segment.position = scene.Point(0, -1) * ppu / 2
-                square.add_child(border_segment)
-
-            if (x + 1, y) not in square_addrs:
-                # right border
-                path = ui.Path()
-                path.line_to((0) * ppu, (1) * ppu)
-                path.line_width = line_width
-
-                border_segment = scene.ShapeNode(path=path,
-                                                 stroke_color='blue')
-                border_segment.position = scene.Point(1, 0) * ppu / 2
-                square.add_child(border_segment)
-
-            if (x - 1, y) not in square_addrs:
-                # left border
-                path = ui.Path()
-                path.line_to((0) * ppu, (1) * ppu)
-                path.line_width = line_width
-
-                border_segment = scene.ShapeNode(path=path,
-                                                 stroke_color='blue')
-                border_segment.position = scene.Point(-1, 0) * ppu / 2
-                square.add_child(border_segment)
-
-        self.square_addrs = [square_addrs]
-        self.offset_addr = [(0, 0)]
-        self.ll_square_color = [ll_color]
-
-        # rotate CW 90, 180, 270, and append to lists indexed by orientation id
-        for oid in range(3):
-            new_square_addrs, partial_offset_addr = rotate_addrs(
-                self.square_addrs[oid])
-            new_offset_addr = (self.offset_addr[oid][1]
-                               + partial_offset_addr[0],
-                               -self.offset_addr[oid][0]
-                               + partial_offset_addr[1])
-            new_ll_square_color = mycolors[(mycolors.index(
-                self.ll_square_color[oid]) + sum(partial_offset_addr)) % 2]
-
-            self.square_addrs.append(new_square_addrs)
-            self.offset_addr.append(new_offset_addr)
-            self.ll_square_color.append(new_ll_square_color)
-
-        # orientation ids correspond to 90 deg CW rotations
-        self.oid = 0
-
-
-pieces = [
-    Piece([(0, 0), (0, 1), (0, 2), (1, 2)], 'red'),
-    Piece([(0, 0), (0, 1), (0, 2), (0, 3), (-1, 3)], 'red'),
-    Piece([(0, 0), (0, 1), (0, 2), (1, 2), (0, 3)], 'red'),
-    Piece([(0, 0), (0, 1), (0, 2), (1, 2), (1, 3)], 'black'),
-    Piece([(0, 0), (0, 1), (0, 2), (-1, 2), (-1, 3)], 'red'),
-    Piece([(0, 0), (0, 1), (0, 2), (0, 3), (-1, 2), (-1, 1)], 'black'),
-    Piece([(0, 0), (0, 1), (0, 2), (-1, 2), (1, 0)], 'red'),
-    Piece([(0, 0), (0, 1), (0, 2), (0, 3), (-1, 3)], 'black'),
-    Piece([(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (2, 0)], 'red'),
-    Piece([(0, 0), (0, 1), (0, 2), (0, 3), (-1, 1), (-1, 2), (1, 1), (1, 2)],
-          'red'),
-    Piece([(0, 0), (0, 1), (0, 2), (0, 3), (1, 1)], 'red'),
-    Piece([(0, 0), (0, 1), (0, 2), (-1, 2), (1, 0)], 'red'),
-]
-
-# piece = pieces[0]
-# for oid in range(4):
-#     logger.debug('%s:\n  %r',
-#         '(square_addrs[oid], offset_addr[oid], ll_square_color[oid])',
-#         (piece.square_addrs[oid], piece.offset_addr[oid],
-#             piece.ll_square_color[oid]),
-#         )
+            # outline segments, on the sides with no neighboring square
+            for (dx, dy), (path, offset) in border_protos.items():
+                if (x + dx, y + dy) not in addr_set:
+                    border_segment = scene.ShapeNode(path=path,
+                                                     stroke_color='blue')
+                    border_segment.position = offset
+                    square.add_child(border_segment)
+
+        # offset_addr in pixels, as plain tuples
+        self.offset_px = [(ox * ppu, oy * ppu) for ox, oy in data.offset_addr]
 
 
 class Puzzle(scene.Scene):
     """A Puzzle object has a board, a pool of pieces, and a solution assembly.
 
-    A piece placement attempt involves
-    * piece id (provided by the freshest generator)
-    * piece orientation id (provided by the freshest generator)
-    * soln.ll -- addr of the leftmost lowest available board space
-    * soln.space_addrs -- addrs of the available board spaces
+    The solution is found by solve() during setup, and is then replayed one
+    piece placement per touch (real or synthetic).  A piece placement involves
+    * piece id and orientation id (provided by the solution)
+    * ll -- addr of the leftmost lowest available board space
+    * move the spotlight to the board space
     * move and rotate the piece sprite to the board space
-    * assess, and update, or revert the sprite move
     """
 
-    # initialize puzzle action timing params from module variables
+    # initialize puzzle action timing and audio params from module variables
     mytiming_unit = mytiming_unit
     mytiming = mytiming
     wait_duration = wait_duration
-
-    def nop(self, *args, **kwargs):
-        """Do nothing and return."""
-        pass
+    audio_enabled = audio_enabled
 
     def setup(self):
         """Prepare the board, the pool of pieces, and the solution assembly.
@@ -277,14 +197,13 @@ class Puzzle(scene.Scene):
         self.board = board  # retain access
 
         # the board's children are squares
-        for i in range(8):
-            for j in range(8):
-                square = scene.SpriteNode(
-                    color=mycolors[(i + j) % 2],
-                    position=unitsize * (i, j),
-                    size=unitsize,
-                )
-                board.add_child(square)
+        for b, addr in enumerate(board_addrs):
+            square = scene.SpriteNode(
+                color=mycolors[board_color_bits[b]],
+                position=board_px[addr],
+                size=unitsize,
+            )
+            board.add_child(square)
 
         # center the board in the scene by adding an offset to the position.
         board.offset = unitsize * -3.5
@@ -308,11 +227,12 @@ class Puzzle(scene.Scene):
                                  stroke_color='yellow')
         pool.add_child(border)
 
-        pool.pieces = pieces
+        # build the piece sprites (only here, not at import)
+        pool.pieces = [PieceSprite(data) for data in pieces_data]
         offset = scene.Point(-2.5, -0.8) * (3.2, 4.5) * ppu
-        for i, piece in enumerate(pieces):
+        for i, piece in enumerate(pool.pieces):
             # give piece a home or parking slip in the pool, and park it
-            piece.home = scene.Point(i//2, (i+1)%2) * (3.2*ppu, 4.5*ppu) \
+            piece.home = scene.Point(i//2, ~i & 1) * (3.2*ppu, 4.5*ppu) \
                     + offset
             piece.position = piece.home
             pool.add_child(piece)
@@ -321,40 +241,44 @@ class Puzzle(scene.Scene):
             piece.shadow.z_position = -1
             pool.add_child(piece.shadow)
 
-        pool.generators = [
-            ((piece.id, oid) for piece in pieces for oid in range(4)
-             if piece.ll_square_color[oid] == self.soln.ll_space_color)
-        ]
-
         #----------------------------------------------------------------------
         # solution assembly
         #----------------------------------------------------------------------
         soln = scene.Node(parent=self)
         self.soln = soln  # retain access
 
-        # initialize the list of placed pieces
-        soln.pieces = []
-        soln.piece_ids = []
-        # initialize the list of coordinates or addresses of open spaces
-        soln.space_addrs = [(i, j) for i in range(8) for j in range(8)]
-        soln.occupied_addrs = []
-
         # put a spotlight on the leftmost space in the lowest unfilled row
         soln.spotlight = Spotlight()
-        ll = leftmost_lowest(soln.space_addrs)
-        soln.spotlight.position = scene.Point(*ll) * ppu
+        soln.spotlight.position = scene.Point(0, 0) * ppu
         soln.add_child(soln.spotlight)
 
-        soln.ll_space_color = mycolors[sum(ll)]
-
         # align the solution assembly's origin, (0, 0), with the board's origin
         soln.position = board.position
 
-        self.attempt_counter = 0
-        self.busy_flag = False
-        self.attempt_started_flag = False
+        # the board's origin relative to the pool's, as a plain tuple, to
+        # position pieces with plain (not scene.Point) arithmetic
+        self.board_pool_delta = (board.position.x - pool.position.x,
+                                 board.position.y - pool.position.y)
+
+        # find the solution up front; touches only replay it
+        soln.placements = solve(pieces_data)
+
+        # the number of placements replayed so far, so soln.placements[:depth]
+        # are the pieces placed
+        soln.depth = 0
+
+        # the actions which don't depend on the destination are built once:
+        # the rotation per orientation id, and the tail of every placement
+        self.rotate_actions = [
+            scene.Action.rotate_by(-math.pi / 2 * oid, *self.mytiming)
+            for oid in range(4)
+        ]
+        self.after_move_actions = [
+            self.new_clear_busy_flag_action(),  # reenable touches
+            scene.Action.wait(self.wait_duration),
+            self.new_touch_began_dummy_action(),  # synthetic touch
+        ]
 
-    def clear_busy_flag(self):
         self.busy_flag = False
 
     def touch_began(self, touch):
@@ -364,172 +288,45 @@ class Puzzle(scene.Scene):
 
         # if busy, disregard the touch
         if self.busy_flag:
-            sound.play_effect('game:Ding_2')
+            if self.audio_enabled:
+                sound.play_effect('game:Ding_2')
             return
 
-        # busy until move completion (placement attempt move or revert move)
-        self.busy_flag = True
-
-        # use freshest generator to get params for this piece placement attempt
-        while True:
-            try:
-                generator = self.pool.generators[-1]
-                piece_id, orientation_id = next(generator)
-                break
-            except StopIteration:
-                # the freshest generator is exhausted, so discard it and revert
-                self.pool.generators.pop()
-
-                piece = self.soln.pieces.pop()
-                addrs = self.soln.occupied_addrs.pop()
-                self.soln.space_addrs.extend(addrs)
-                soln.piece_ids.pop()
-
-                # update the spotlight
-                ll_space_addr = leftmost_lowest(self.soln.space_addrs)
-                self.soln.spotlight.position = unitsize * ll_space_addr
-                soln.ll_space_color = mycolors[sum(ll_space_addr) % 2]
-
-                # move the sprite home
-                move_action = scene.Action.group(
-                    scene.Action.move_to(*piece.home, *self.mytiming),
-                    scene.Action.rotate_by(-math.pi / 2 * -piece.oid,
-                                           *self.mytiming),
-                )
-
-                piece.run_action(
-                    scene.Action.sequence(
-                        scene.Action.wait(self.wait_duration),
-                        move_action,
-                        self.new_clear_busy_flag_action(),  # reenable touches
-                        scene.Action.wait(self.wait_duration),
-                        self.new_touch_began_dummy_action(),  # synthetic touch
-                    ))
+        # if the solution has been replayed entirely, disregard the touch
+        if soln.depth == len(soln.placements):
+            return
 
-                sound.play_effect('game:Error')
-                return
+        # busy until move completion
+        self.busy_flag = True
 
+        piece_id, orientation_id, ll_space_addr = soln.placements[soln.depth]
         piece = self.pool.pieces[piece_id]
 
-        ll_space_addr = leftmost_lowest(self.soln.space_addrs)
-        x, y = (self.board.position - self.pool.position
-                + scene.Point(*ll_space_addr) * ppu)
+        # update the spotlight
+        x, y = board_px[ll_space_addr]
+        soln.spotlight.position = (x, y)
 
         # move the selected piece/orientation to the spotlighted empty square,
-        # and set flag for the update method to assess and accept or reject
-        # the attempt
-
-        new_position = (self.board.position - self.pool.position
-                        + scene.Point(*ll_space_addr) * ppu
-                        + unitsize * piece.offset_addr[orientation_id])
+        # then synthesize a touch to replay the next placement
+        dx, dy = self.board_pool_delta
+        ox, oy = piece.offset_px[orientation_id]
+        new_position = (dx + x + ox, dy + y + oy)
         move_action = scene.Action.group(
             scene.Action.move_to(*new_position, *self.mytiming),
-            scene.Action.rotate_by(-math.pi / 2 * orientation_id,
-                                   *self.mytiming),
+            self.rotate_actions[orientation_id],
         )
-        clear_busy_flag_action = scene.Action.call(self.clear_busy_flag)
 
         piece.run_action(
-            scene.Action.sequence(
-                move_action,
-                clear_busy_flag_action,
-                # set_attempt_started_flag_action,
-            ))
-        self.attempt_started_flag = True
-
-        self.attempt_counter += 1
-        if self.attempt_counter % 1000 == 0:
-            logger.debug('%s: %r', 'attempt_counter', self.attempt_counter)
-        self.soln.pieces.append(piece)
+            scene.Action.sequence(move_action, *self.after_move_actions))
 
-        piece.oid = orientation_id
+        soln.depth += 1
 
-    def is_viable(self):
-        """Return True if the current piece placement attempt is viable."""
-        piece = self.soln.pieces[-1]
+        if self.audio_enabled:
+            sound.play_effect('game:Ding_1')
 
-        square_addrs = piece.square_addrs[piece.oid]
-        space_addrs = self.soln.space_addrs
-        ll_space_addr = leftmost_lowest(space_addrs)
-        new_addrs = [(addr[0] + ll_space_addr[0], addr[1] + ll_space_addr[1])
-                     for addr in square_addrs]
-
-        return all(addr in space_addrs for addr in new_addrs)
-
-    def update(self):
-        if self.busy_flag:
-            return
-
-        if self.attempt_started_flag:
-            self.attempt_started_flag = False
-            self.busy_flag = True  # block touches
-
-            # a piece placement attempt was started, and the sprite was moved
-            piece = self.soln.pieces[-1]
-            soln = self.soln
-
-            square_addrs = piece.square_addrs[piece.oid]
-            space_addrs = soln.space_addrs
-            ll_space_addr = leftmost_lowest(space_addrs)
-            new_addrs = [(addr[0] + ll_space_addr[0],
-                          addr[1] + ll_space_addr[1]) for addr in square_addrs]
-
-            # for each piece square, remove coordinates from list of spaces
-
-            if self.is_viable():
-                # the current placement attempt is viable, so complete it
-                # transplant new_addrs from space_addrs to occupied_addrs
-                for addr in new_addrs:
-                    i = soln.space_addrs.index(addr)
-                    soln.space_addrs.pop(i)
-                soln.occupied_addrs.append(new_addrs)
-
-                soln.piece_ids.append(piece.id)
-
-                sound.play_effect('game:Ding_1')
-
-                # are there no more spaces?  then the soln assembly is complete
-                if len(soln.piece_ids) == len(pieces):
-                    logger.info('%s: %r', 'attempt_counter',
-                                self.attempt_counter)
-
-                    # disable touch_began
-                    # self.update = self.nop
-                    self.touch_began = self.nop
-
-                # update the spotlight
-                ll_space_addr = leftmost_lowest(soln.space_addrs)
-                soln.spotlight.position = unitsize * ll_space_addr
-                soln.ll_space_color = mycolors[sum(ll_space_addr) % 2]
-
-                # stack on a new generator
-                self.pool.generators.append(
-                    ((piece.id, oid) for piece in pieces for oid in range(4)
-                     if piece.ll_square_color[oid] == self.soln.ll_space_color
-                     and piece.id not in soln.piece_ids))
-
-                self.busy_flag = False  # reenable touches
-                self.touch_began('dummy')  # synthetic touch
-
-            else:
-                # the current placement attempt is incompatible, so revert it
-                move_action = scene.Action.group(
-                    scene.Action.move_to(*piece.home, *self.mytiming),
-                    scene.Action.rotate_by(-math.pi / 2 * -piece.oid,
-                                           *self.mytiming),
-                )
-
-                piece.run_action(
-                    scene.Action.sequence(
-                        move_action,
-                        self.new_clear_busy_flag_action(),  # reenable touches
-                        self.new_touch_began_dummy_action(),  # synthetic touch
-                    ))
-
-                sound.play_effect('game:Error')
-
-                piece.oid = 0
-                self.soln.pieces.pop()
+        # are there no more pieces?  then the soln assembly is complete
+        if soln.depth == len(soln.placements):
+            soln.spotlight.remove_from_parent()
 
     def _clear_busy_flag(self):
         self.busy_flag = False
@@ -555,4 +352,3 @@ class Puzzle(scene.Scene):
 
 
 scene.run(Puzzle(), scene.PORTRAIT)
-